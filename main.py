@@ -1,38 +1,113 @@
 import os
 import time
-import uuid
-from typing import List, Optional, Literal, Dict, Any
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Literal, Dict, Any, Deque, FrozenSet, Tuple
+import orjson
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+app = FastAPI(title="D‑Shield Mock API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Same headers CORSMiddleware(allow_origins=["*"], allow_methods=["*"],
+# allow_headers=["*"], allow_credentials=True) sends, precomputed.
+_CORS_CREDENTIALS = (b"access-control-allow-credentials", b"true")
+_CORS_VARY_ORIGIN = (b"vary", b"Origin")
+_CORS_ANY_ORIGIN = [(b"access-control-allow-origin", b"*"), _CORS_CREDENTIALS]
+_CORS_PREFLIGHT_HEADERS = [
+    _CORS_CREDENTIALS,
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"600"),
+    _CORS_VARY_ORIGIN,
+]
 
-app = FastAPI(title="D‑Shield Mock API", version="1.0.0")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class OpenCORSMiddleware:
+    """CORS for the allow-everything case: constant headers, no origin matching."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        origin = cookie = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"cookie":
+                cookie = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            # "*" in Access-Control-Allow-Headers never covers Authorization,
+            # so echo what the browser asked for.
+            headers = [(b"access-control-allow-origin", origin), *_CORS_PREFLIGHT_HEADERS]
+            if request_headers is not None:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # Credentialed (cookie) requests need the explicit origin rather than "*".
+        if cookie is None:
+            cors_headers = _CORS_ANY_ORIGIN
+        else:
+            cors_headers = [(b"access-control-allow-origin", origin), _CORS_CREDENTIALS, _CORS_VARY_ORIGIN]
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+app.add_middleware(OpenCORSMiddleware)
+
+
+# ------------------------------
+# Random ids
+# ------------------------------
+_TOKEN_BATCH = 1024
+_TOKEN_POOL: Deque[str] = deque(maxlen=_TOKEN_BATCH)
+
+
+def _next_token() -> str:
+    """Return a random 32-char hex token, refilling the pool from one urandom call."""
+    try:
+        return _TOKEN_POOL.popleft()
+    except IndexError:
+        buf = os.urandom(16 * _TOKEN_BATCH)
+        _TOKEN_POOL.extend(buf[i:i + 16].hex() for i in range(0, len(buf), 16))
+        return _TOKEN_POOL.popleft()
 
 
 # ------------------------------
 # General + Health
 # ------------------------------
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "D‑Shield mock backend is running"}
 
 
 @app.get("/api/hello")
-def hello():
+async def hello():
     return {"message": "Hello from the backend API!"}
 
 
-@app.get("/test")
-def test_database():
-    """Test endpoint to check if database env is available (mock friendly)."""
+def _test_response() -> Dict[str, Any]:
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Used (mock data)",
@@ -51,10 +126,21 @@ def test_database():
     return response
 
 
+# The environment is read once at startup; restart to pick up changes.
+_TEST_RESPONSE_JSON = orjson.dumps(_test_response())
+
+
+@app.get("/test")
+async def test_database():
+    """Test endpoint to check if database env is available (mock friendly)."""
+    return Response(content=_TEST_RESPONSE_JSON, media_type="application/json")
+
+
 # ------------------------------
 # Solutions (static copy)
 # ------------------------------
-class SolutionItem(BaseModel):
+@dataclass(slots=True, frozen=True)
+class SolutionItem:
     key: str
     title: str
     summary: str
@@ -84,19 +170,24 @@ SOLUTIONS: List[SolutionItem] = [
 ]
 
 
-@app.get("/api/solutions", response_model=List[SolutionItem])
-def get_solutions():
-    return SOLUTIONS
+# Static payloads are serialized once so requests skip validation/encoding.
+_SOLUTIONS_JSON = orjson.dumps(SOLUTIONS)
+
+
+@app.get("/api/solutions")
+async def get_solutions():
+    return Response(content=_SOLUTIONS_JSON, media_type="application/json")
 
 
 # ------------------------------
 # EmBrain demo endpoints (mock)
 # ------------------------------
-class EmbrainEntity(BaseModel):
+@dataclass(slots=True)
+class EmbrainEntity:
     id: str
     name: str
     type: Literal["person", "organization"]
-    tags: List[str] = []
+    tags: List[str] = field(default_factory=list)
     notes: Optional[str] = None
 
 
@@ -106,44 +197,145 @@ EMBRAIN_FIXTURES: List[EmbrainEntity] = [
     EmbrainEntity(id="p_002", name="Jordan Lee", type="person", tags=["watch"], notes=None),
 ]
 
+_EMBRAIN_BY_ID: Dict[str, EmbrainEntity] = {e.id: e for e in EMBRAIN_FIXTURES}
+
+
+# Case folding shared by stored values and request inputs: ASCII text takes a
+# single translate pass, anything else falls back to str.lower().
+_LOWER_TABLE = str.maketrans({chr(c): chr(c + 32) for c in range(ord("A"), ord("Z") + 1)})
+
+
+def _fold(s: str) -> str:
+    return s.translate(_LOWER_TABLE) if s.isascii() else s.lower()
+
+
+def _norm(s: str) -> str:
+    """Normalize request input: fold case and strip surrounding whitespace."""
+    return _fold(s).strip()
+
+
+def _build_tag_bits() -> Dict[str, int]:
+    bits: Dict[str, int] = {}
+    for e in EMBRAIN_FIXTURES:
+        for t in e.tags:
+            bits.setdefault(_fold(t), 1 << len(bits))
+    return bits
+
+
+# Lowercased fixture tag -> single-bit mask. Fixed at import so client-supplied
+# tags cannot grow it; other tags are kept per entity in a frozenset.
+_TAG_BIT: Dict[str, int] = _build_tag_bits()
+
+
+def _tag_index(tags: List[str]) -> Tuple[int, FrozenSet[str]]:
+    mask = 0
+    extra = []
+    for t in tags:
+        t = _fold(t)
+        bit = _TAG_BIT.get(t)
+        if bit is None:
+            extra.append(t)
+        else:
+            mask |= bit
+    return mask, frozenset(extra)
+
+
+# Tag mask and out-of-vocabulary tags per entity; refresh whenever an entity's tags change.
+_EMBRAIN_TAGS: Dict[str, Tuple[int, FrozenSet[str]]] = {e.id: _tag_index(e.tags) for e in EMBRAIN_FIXTURES}
+
+
+# Case-folded names joined by NUL, with each name's start offset, so a name
+# query is a few bytes.find calls over one buffer. Names never change.
+def _build_names_index() -> Tuple[bytes, List[int]]:
+    names = [_fold(e.name).encode() for e in EMBRAIN_FIXTURES]
+    offsets = []
+    pos = 0
+    for name in names:
+        offsets.append(pos)
+        pos += len(name) + 1
+    return b"\x00".join(names), offsets
+
+
+_NAMES_BLOB, _NAME_OFFSETS = _build_names_index()
+
+
+def _name_matches(q: str) -> List[int]:
+    """Indexes into EMBRAIN_FIXTURES whose case-folded name contains q."""
+    # surrogatepass keeps lone surrogates encodable; they never match valid UTF-8
+    needle = q.encode("utf-8", "surrogatepass")
+    hits = []
+    pos = _NAMES_BLOB.find(needle)
+    while pos != -1:
+        i = bisect_right(_NAME_OFFSETS, pos) - 1
+        hits.append(i)
+        if i + 1 == len(_NAME_OFFSETS):
+            break
+        pos = _NAMES_BLOB.find(needle, _NAME_OFFSETS[i + 1])
+    return hits
+
 
 class SearchQuery(BaseModel):
     q: str = Field("", description="Search query")
     tag: Optional[str] = None
 
 
-@app.post("/api/embrain/search", response_model=List[EmbrainEntity])
-def embrain_search(body: SearchQuery):
-    q = body.q.lower().strip()
-    tag = (body.tag or "").lower().strip()
-    results = []
-    for e in EMBRAIN_FIXTURES:
-        if q and q not in e.name.lower():
-            continue
-        if tag and tag not in [t.lower() for t in e.tags]:
-            continue
-        results.append(e)
-    return results
+def _embrain_search(q: str, tag: str) -> Tuple[str, ...]:
+    """Ids of matching entities for normalized inputs."""
+    bit = _TAG_BIT.get(tag, 0)
+    if q:
+        if "\x00" in q:
+            return ()
+        candidates = [EMBRAIN_FIXTURES[i] for i in _name_matches(q)]
+    else:
+        candidates = EMBRAIN_FIXTURES
+    if not tag:
+        return tuple(e.id for e in candidates)
+    if bit:
+        return tuple(e.id for e in candidates if _EMBRAIN_TAGS[e.id][0] & bit)
+    return tuple(e.id for e in candidates if tag in _EMBRAIN_TAGS[e.id][1])
 
 
-class TagUpdate(BaseModel):
-    id: str
-    add: List[str] = []
-    remove: List[str] = []
+# Cleared on tag updates. Only short inputs are cached so a client cannot pin
+# arbitrarily large query strings in memory.
+_embrain_search_cached = lru_cache(maxsize=256)(_embrain_search)
+_SEARCH_CACHE_MAX_LEN = 200
 
 
-@app.post("/api/embrain/tags", response_model=EmbrainEntity)
-def embrain_update_tags(body: TagUpdate):
-    for e in EMBRAIN_FIXTURES:
-        if e.id == body.id:
-            # remove
-            e.tags = [t for t in e.tags if t not in set(body.remove)]
-            # add
-            for t in body.add:
-                if t not in e.tags:
-                    e.tags.append(t)
-            return e
-    raise HTTPException(status_code=404, detail="Entity not found")
+@app.post("/api/embrain/search")
+async def embrain_search(body: SearchQuery):
+    q = _norm(body.q)
+    tag = _norm(body.tag or "")
+    if len(q) + len(tag) <= _SEARCH_CACHE_MAX_LEN:
+        ids = _embrain_search_cached(q, tag)
+    else:
+        ids = _embrain_search(q, tag)
+    return ORJSONResponse([_EMBRAIN_BY_ID[i] for i in ids])
+
+
+class TagUpdate(BaseModel):
+    id: str
+    add: Tuple[str, ...] = ()
+    remove: Tuple[str, ...] = ()
+
+
+@app.post("/api/embrain/tags")
+async def embrain_update_tags(body: TagUpdate):
+    e = _EMBRAIN_BY_ID.get(body.id)
+    if e is None:
+        raise HTTPException(status_code=404, detail="Entity not found")
+    # remove
+    remove_set = set(body.remove)
+    tags = [t for t in e.tags if t not in remove_set]
+    # add
+    seen = set(tags)
+    for t in body.add:
+        if t not in seen:
+            seen.add(t)
+            tags.append(t)
+    e.tags = tags
+    _EMBRAIN_TAGS[e.id] = _tag_index(e.tags)
+    _embrain_search_cached.cache_clear()
+    return ORJSONResponse(e)
 
 
 class InstanceCreate(BaseModel):
@@ -151,14 +343,15 @@ class InstanceCreate(BaseModel):
 
 
 @app.post("/api/embrain/create-instance")
-def embrain_create_instance(body: InstanceCreate):
-    return {"instanceId": f"inst_{uuid.uuid4().hex[:8]}", "name": body.name, "status": "provisioning"}
+async def embrain_create_instance(body: InstanceCreate):
+    return {"instanceId": f"inst_{_next_token()[:8]}", "name": body.name, "status": "provisioning"}
 
 
 # ------------------------------
 # Social Dome demo endpoints (mock)
 # ------------------------------
-class PostItem(BaseModel):
+@dataclass(slots=True, frozen=True)
+class PostItem:
     id: str
     author: str
     text: str
@@ -167,18 +360,29 @@ class PostItem(BaseModel):
     geo: Optional[Dict[str, float]] = None
 
 
+# Single timestamp so fixture offsets are consistent with each other.
+_T0 = time.time()
+
 SOCIAL_FEED: List[PostItem] = [
-    PostItem(id="t1", author="@k12_watch", text="School event delayed due to weather.", score="green", created_at=time.time() - 5400),
-    PostItem(id="t2", author="@city_updates", text="Road closure near central hub tonight.", score="yellow", created_at=time.time() - 3200, geo={"lat": 40.71, "lng": -74.0}),
-    PostItem(id="t3", author="@alerts_bot", text="Verified threat rumor is false; standing down.", score="green", created_at=time.time() - 1200),
-    PostItem(id="t4", author="@ops_team", text="Escalation candidate: coordinated disruption chatter.", score="red", created_at=time.time() - 300, geo={"lat": 34.05, "lng": -118.24}),
+    PostItem(id="t1", author="@k12_watch", text="School event delayed due to weather.", score="green", created_at=_T0 - 5400),
+    PostItem(id="t2", author="@city_updates", text="Road closure near central hub tonight.", score="yellow", created_at=_T0 - 3200, geo={"lat": 40.71, "lng": -74.0}),
+    PostItem(id="t3", author="@alerts_bot", text="Verified threat rumor is false; standing down.", score="green", created_at=_T0 - 1200),
+    PostItem(id="t4", author="@ops_team", text="Escalation candidate: coordinated disruption chatter.", score="red", created_at=_T0 - 300, geo={"lat": 34.05, "lng": -118.24}),
 ]
 
 
-@app.get("/api/social-dome/feed", response_model=List[PostItem])
-def social_dome_feed(limit: int = 20):
-    items = list(sorted(SOCIAL_FEED, key=lambda p: p.created_at, reverse=True))
-    return items[:limit]
+# SOCIAL_FEED is static; re-sort here if it ever gains a mutator.
+_SOCIAL_FEED_SORTED: List[PostItem] = sorted(SOCIAL_FEED, key=lambda p: p.created_at, reverse=True)
+
+
+@lru_cache(maxsize=32)
+def _social_feed_json(limit: int) -> bytes:
+    return orjson.dumps(_SOCIAL_FEED_SORTED[:limit])
+
+
+@app.get("/api/social-dome/feed")
+async def social_dome_feed(limit: int = 20):
+    return Response(content=_social_feed_json(limit), media_type="application/json")
 
 
 # ------------------------------
@@ -188,65 +392,102 @@ class RunRequest(BaseModel):
     poi: str
 
 
-class RunStatus(BaseModel):
+@dataclass(slots=True)
+class RunStatus:
     job_id: str
     status: Literal["queued", "running", "completed"]
     progress: int = 0
-    activity: List[str] = []
+    activity: List[str] = field(default_factory=list)
     report_url: Optional[str] = None
 
 
+# Live jobs. Handlers run on the event loop and never await while updating
+# a status, so each poll advances its job atomically without a lock.
 JOBS: Dict[str, RunStatus] = {}
+# Completed jobs keep only their final serialized status.
+_FINISHED: Dict[str, bytes] = {}
+
+# Recycled RunStatus instances (and their activity lists).
+_STATUS_POOL: List[RunStatus] = []
+
+
+def _acquire_status(job_id: str, message: str) -> RunStatus:
+    if not _STATUS_POOL:
+        return RunStatus(job_id=job_id, status="queued", progress=0, activity=[message])
+    status = _STATUS_POOL.pop()
+    status.job_id = job_id
+    status.status = "queued"
+    status.progress = 0
+    status.activity.append(message)
+    status.report_url = None
+    return status
+
 
+def _release_status(status: RunStatus) -> None:
+    status.activity.clear()
+    _STATUS_POOL.append(status)
 
-@app.post("/api/napoleon/run", response_model=RunStatus)
-def napoleon_run(req: RunRequest):
-    job_id = uuid.uuid4().hex[:10]
-    status = RunStatus(job_id=job_id, status="queued", progress=0, activity=[f"Queued job for {req.poi}"])
+
+_STEP_MESSAGES = (
+    "Dispatching research agents",
+    "Collecting sources",
+    "Synthesizing findings",
+    "Compiling report",
+)
+_PROGRESS = (25, 50, 75, 100)
+
+
+@app.post("/api/napoleon/run")
+async def napoleon_run(req: RunRequest):
+    job_id = _next_token()[:10]
+    status = _acquire_status(job_id, f"Queued job for {req.poi}")
     JOBS[job_id] = status
-    return status
+    return ORJSONResponse(status)
 
 
-@app.get("/api/napoleon/status/{job_id}", response_model=RunStatus)
-def napoleon_status(job_id: str):
+@app.get("/api/napoleon/status/{job_id}")
+async def napoleon_status(job_id: str):
     status = JOBS.get(job_id)
-    if not status:
-        raise HTTPException(status_code=404, detail="Job not found")
-    # simulate progression
-    if status.status != "completed":
-        step_messages = [
-            "Dispatching research agents",
-            "Collecting sources",
-            "Synthesizing findings",
-            "Compiling report",
-        ]
-        next_prog = min(100, status.progress + 25)
-        status.progress = next_prog
-        status.status = "running" if next_prog < 100 else "completed"
-        if len(status.activity) - 1 < len(step_messages):
-            status.activity.append(step_messages[len(status.activity) - 1])
-        if status.status == "completed":
-            status.report_url = "/mock/reports/sample.pdf"
-    return status
+    if status is None:
+        finished = _FINISHED.get(job_id)
+        if finished is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return Response(content=finished, media_type="application/json")
+    # simulate progression: one step per poll, activity[0] is the queue message
+    step = len(status.activity) - 1
+    status.progress = _PROGRESS[step]
+    status.activity.append(_STEP_MESSAGES[step])
+    if step < len(_STEP_MESSAGES) - 1:
+        status.status = "running"
+        return ORJSONResponse(status)
+    status.status = "completed"
+    status.report_url = "/mock/reports/sample.pdf"
+    finished = _FINISHED[job_id] = orjson.dumps(status)
+    del JOBS[job_id]
+    _release_status(status)
+    return Response(content=finished, media_type="application/json")
 
 
 # ------------------------------
 # Relationship Analysis demo (mock graph)
 # ------------------------------
-class GraphNode(BaseModel):
+@dataclass(slots=True, frozen=True)
+class GraphNode:
     id: str
     label: str
     type: Literal["person", "org", "location"]
 
 
-class GraphEdge(BaseModel):
+@dataclass(slots=True, frozen=True)
+class GraphEdge:
     id: str
     source: str
     target: str
     relation: Literal["works_at", "knows", "located_in"]
 
 
-class GraphData(BaseModel):
+@dataclass(slots=True, frozen=True)
+class GraphData:
     nodes: List[GraphNode]
     edges: List[GraphEdge]
 
@@ -267,9 +508,12 @@ GRAPH_DATA = GraphData(
 )
 
 
-@app.get("/api/relationships/graph", response_model=GraphData)
-def get_graph():
-    return GRAPH_DATA
+_GRAPH_JSON = orjson.dumps(GRAPH_DATA)
+
+
+@app.get("/api/relationships/graph")
+async def get_graph():
+    return Response(content=_GRAPH_JSON, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+"""
+Optional native build of the API module.
+
+Compiles main.py with Cython so uvicorn imports the extension module
+instead of the pure-Python source:
+
+    pip install cython
+    python setup.py build_ext --inplace
+
+Python imports main.*.so ahead of main.py, and nothing rebuilds it for
+you: after a build, edits to main.py are ignored (including by uvicorn
+--reload and by pytest) until you rebuild or delete the .so. The .so is
+hidden by .gitignore. start_server.sh and test_main.py refuse to run
+against a main.*.so that is older than main.py.
+Delete the generated main.*.so to go back to the interpreted module.
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="dshield-mock-api",
+    ext_modules=cythonize(
+        ["main.py"],
+        compiler_directives={
+            "language_level": 3,
+            # FastAPI introspects handler signatures and annotations.
+            "binding": True,
+            "boundscheck": False,
+            "wraparound": False,
+            "initializedcheck": False,
+        },
+    ),
+)
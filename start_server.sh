@@ -11,6 +11,14 @@ if [ ! -z "$PIDS" ]; then
   sleep 2
 fi
 
+# A compiled main.*.so (see setup.py) shadows main.py; refuse a stale one.
+for so in main.*.so; do
+  if [ -e "$so" ] && [ main.py -nt "$so" ]; then
+    echo "$so is older than main.py; rebuild it (python setup.py build_ext --inplace) or delete it."
+    exit 1
+  fi
+done
+
 mkdir -p logs
 echo "Installing dependencies..."
 pip install -r requirements.txt
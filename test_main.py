@@ -0,0 +1,197 @@
+import asyncio
+import os
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def _search(**body):
+    response = asyncio.run(main.embrain_search(main.SearchQuery(**body)))
+    return orjson.loads(response.body)
+
+
+def _update_tags(**body):
+    response = asyncio.run(main.embrain_update_tags(main.TagUpdate(**body)))
+    return orjson.loads(response.body)
+
+
+def _ids(results):
+    return [e["id"] for e in results]
+
+
+@pytest.fixture
+def restore_tags():
+    saved = {e.id: list(e.tags) for e in main.EMBRAIN_FIXTURES}
+    yield
+    for e in main.EMBRAIN_FIXTURES:
+        e.tags = saved[e.id]
+        main._EMBRAIN_TAGS[e.id] = main._tag_index(e.tags)
+    main._embrain_search_cached.cache_clear()
+
+
+def test_embrain_search_finds_new_tag_in_any_case(restore_tags):
+    assert _search(tag="Hot") == []
+    _update_tags(id="p_002", add=["Hot"])
+    assert "hot" not in main._TAG_BIT
+    assert _ids(_search(tag="HOT")) == ["p_002"]
+    assert _ids(_search(tag=" hot ")) == ["p_002"]
+
+
+def test_embrain_search_reflects_removed_fixture_tag(restore_tags):
+    assert _ids(_search(tag="priority")) == ["p_001"]
+    _update_tags(id="p_001", remove=["priority"])
+    assert _search(tag="priority") == []
+    assert _ids(_search(tag="us")) == ["p_001"]
+
+
+def test_embrain_search_folds_non_ascii_tags(restore_tags):
+    _update_tags(id="p_002", add=["Über"])
+    assert _ids(_search(tag="über")) == ["p_002"]
+    assert _ids(_search(tag="ÜBER")) == ["p_002"]
+
+
+def test_fold_matches_str_lower():
+    for s in ("Alex Rivera", "ÉCOLE", "Straße", "İstanbul"):
+        assert main._fold(s) == s.lower()
+
+
+def test_embrain_search_combines_name_and_tag(restore_tags):
+    assert _ids(_search(q="a", tag="watch")) == ["p_002"]
+    assert _ids(_search(q="a", tag="vendor")) == ["o_101"]
+    assert _search(q="alex", tag="vendor") == []
+
+
+def test_embrain_search_matches_name_substring():
+    assert [e["id"] for e in _search(q="  LEE ")] == ["p_002"]
+
+
+def test_embrain_search_lone_surrogate_returns_no_results():
+    assert _search(q="\ud800") == []
+    assert _search(q="a\udfffb") == []
+
+
+def test_embrain_search_does_not_cache_long_queries():
+    main._embrain_search_cached.cache_clear()
+    assert _search(q="x" * 500) == []
+    assert _search(q="a" * 150, tag="b" * 100) == []
+    assert main._embrain_search_cached.cache_info().currsize == 0
+    assert [e["id"] for e in _search(q="alex")] == ["p_001"]
+    assert main._embrain_search_cached.cache_info().currsize == 1
+
+
+def _run(poi):
+    response = asyncio.run(main.napoleon_run(main.RunRequest(poi=poi)))
+    return orjson.loads(response.body)
+
+
+def _poll(job_id):
+    response = asyncio.run(main.napoleon_status(job_id))
+    return orjson.loads(response.body)
+
+
+def test_napoleon_job_runs_to_completion_and_recycles_status():
+    job_id = _run("Alex")["job_id"]
+    status = main.JOBS[job_id]
+
+    progress = [_poll(job_id)["progress"] for _ in range(4)]
+    assert progress == [25, 50, 75, 100]
+    assert job_id not in main.JOBS
+    assert main._STATUS_POOL[-1] is status
+
+    done = _poll(job_id)
+    assert done["status"] == "completed"
+    assert done["report_url"] == "/mock/reports/sample.pdf"
+    assert done["activity"] == ["Queued job for Alex", *main._STEP_MESSAGES]
+    assert main._FINISHED[job_id] == orjson.dumps(done)
+
+    second = _run("Jordan")
+    assert main.JOBS[second["job_id"]] is status
+    assert second == {
+        "job_id": second["job_id"],
+        "status": "queued",
+        "progress": 0,
+        "activity": ["Queued job for Jordan"],
+        "report_url": None,
+    }
+    assert _poll(second["job_id"])["activity"] == ["Queued job for Jordan", main._STEP_MESSAGES[0]]
+    # the finished job is unaffected by reuse of its status object
+    assert _poll(job_id) == done
+
+
+def test_napoleon_concurrent_polls_advance_one_step_each():
+    job_id = _run("Alex")["job_id"]
+
+    async def poll_all():
+        return await asyncio.gather(*(main.napoleon_status(job_id) for _ in range(4)))
+
+    results = [orjson.loads(r.body) for r in asyncio.run(poll_all())]
+    assert [r["progress"] for r in results] == [25, 50, 75, 100]
+    assert results[-1]["activity"] == ["Queued job for Alex", *main._STEP_MESSAGES]
+
+
+def test_napoleon_status_unknown_job():
+    with pytest.raises(HTTPException) as exc:
+        _poll("missing")
+    assert exc.value.status_code == 404
+
+
+def _cors(method, headers):
+    """Run OpenCORSMiddleware around a stub app; return (status, headers)."""
+
+    async def inner(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    asyncio.run(main.OpenCORSMiddleware(inner)(scope, None, send))
+    start = messages[0]
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}
+
+
+def test_cors_preflight_echoes_origin_and_requested_headers():
+    status, headers = _cors("OPTIONS", {
+        "Origin": "http://app.example",
+        "Access-Control-Request-Method": "POST",
+        "Access-Control-Request-Headers": "authorization, content-type",
+    })
+    assert status == 204
+    assert headers["access-control-allow-origin"] == "http://app.example"
+    assert headers["access-control-allow-headers"] == "authorization, content-type"
+    assert headers["access-control-allow-credentials"] == "true"
+
+
+def test_cors_non_preflight_options_reaches_the_app():
+    assert _cors("OPTIONS", {}) == (200, {"content-type": "text/plain"})
+    status, headers = _cors("OPTIONS", {"Origin": "http://app.example"})
+    assert status == 200
+    assert headers["access-control-allow-origin"] == "*"
+
+
+def test_cors_simple_request_headers():
+    assert _cors("GET", {})[1] == {"content-type": "text/plain"}
+    _, headers = _cors("GET", {"Origin": "http://app.example"})
+    assert headers["access-control-allow-origin"] == "*"
+    assert headers["access-control-allow-credentials"] == "true"
+    _, headers = _cors("GET", {"Origin": "http://app.example", "Cookie": "session=1"})
+    assert headers["access-control-allow-origin"] == "http://app.example"
+    assert headers["vary"] == "Origin"
+
+
+def test_compiled_main_is_not_stale():
+    # A main.*.so from setup.py shadows main.py; make sure it was built from it.
+    if main.__file__.endswith(".py"):
+        return
+    source = os.path.join(os.path.dirname(main.__file__), "main.py")
+    assert os.path.getmtime(main.__file__) >= os.path.getmtime(source), f"{main.__file__} is older than main.py"